@@ -8,10 +8,21 @@ containing the structure of an Ansible role.
 
 import os
 import sys
+import stat
 import yaml
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+# Prefer the libyaml C bindings, fall back to the pure-Python implementation
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
+
+# Number of threads reading and parsing the role YAML files
+_READ_WORKERS = 8
+
 
 class AnsibleRoleDirDocGenerator:
     """Documentation generator for Ansible roles from directory structure."""
@@ -32,482 +43,552 @@ class AnsibleRoleDirDocGenerator:
         # Get role name from directory name
         self.role_name = self.role_path.name
         
+        # String paths of the files and directories read on every extraction
+        role_dir = str(self.role_path)
+        self._meta_path = os.path.join(role_dir, "meta", "main.yml")
+        self._defaults_path = os.path.join(role_dir, "defaults", "main.yml")
+        self._handlers_path = os.path.join(role_dir, "handlers", "main.yml")
+        self._tasks_dir = os.path.join(role_dir, "tasks")
+        self._vars_dir = os.path.join(role_dir, "vars")
+        
         # Check that the output format is valid
         if self.output_format not in ["markdown", "text"]:
             raise ValueError("Output format must be 'markdown' or 'text'")
         
-        # Check that the directory exists and is a directory
-        if not self.role_path.exists():
+        # Check that the directory exists and is a directory (a single stat call)
+        try:
+            st = os.stat(self.role_path)
+        except (FileNotFoundError, NotADirectoryError):
             raise ValueError(f"Role path {self.role_path} does not exist")
-        if not self.role_path.is_dir():
+        if not stat.S_ISDIR(st.st_mode):
             raise ValueError(f"Role path {self.role_path} is not a directory")
     
     def extract_role_info(self):
         """Extract role information from the directory."""
-        try:
-            # Build file list
-            file_list = self._build_file_list()
-            
-            # Extract role structure
-            self.role_structure = self._analyze_structure(file_list)
-            
-            # Get content of important files
-            metadata = self._read_metadata()
-            defaults = self._read_defaults()
-            tasks = self._read_tasks()
-            templates = self._find_templates(file_list)
-            handlers = self._read_handlers()
-            vars_data = self._read_vars()
+        # Extract role structure and templates in a single traversal
+        self.role_structure = {}
+        templates = []
+        self._scan(str(self.role_path), self.role_structure, [], templates)
+        
+        # Get content of important files, every YAML file being read concurrently
+        with ThreadPoolExecutor(max_workers=_READ_WORKERS) as executor:
+            metadata = executor.submit(self._read_metadata)
+            defaults = executor.submit(self._read_defaults)
+            tasks = self._read_tasks(executor)
+            handlers = executor.submit(self._read_handlers)
+            vars_data = self._read_vars(executor)
             
             return {
                 "name": self.role_name,
                 "structure": self.role_structure,
-                "metadata": metadata,
-                "defaults": defaults,
-                "tasks": tasks,
+                "metadata": metadata.result(),
+                "defaults": defaults.result(),
+                "tasks": {name: future.result() for name, future in tasks.items()},
                 "templates": templates,
-                "handlers": handlers,
-                "vars": vars_data
+                "handlers": handlers.result(),
+                "vars": {name: future.result() for name, future in vars_data.items()}
             }
-        except Exception as e:
-            raise Exception(f"Error extracting role info: {str(e)}")
-    
-    def _build_file_list(self):
-        """Build a list of all files in the role directory."""
-        file_list = []
-        for root, _, files in os.walk(self.role_path):
-            for file in files:
-                path = Path(root) / file
-                rel_path = path.relative_to(self.role_path.parent)
-                file_list.append(str(rel_path))
-        return file_list
     
-    def _analyze_structure(self, file_list):
-        """Analyze the role structure from file paths."""
-        structure = {}
-        
-        for file_path in file_list:
-            parts = file_path.split(os.sep)
-            # Skip role name at the beginning of the path
-            if len(parts) > 1 and parts[0] == self.role_name:
-                parts = parts[1:]
-            
-            current_level = structure
-            for i, part in enumerate(parts):
-                if i == len(parts) - 1 and part:  # If it's a file (not an empty directory)
-                    if "__files__" not in current_level:
-                        current_level["__files__"] = []
-                    current_level["__files__"].append(part)
-                elif part:  # If it's a directory
-                    if part not in current_level:
-                        current_level[part] = {}
-                    current_level = current_level[part]
-        
-        return structure
+    def _scan(self, directory, node, rel_parts, templates):
+        """
+        Walk a directory, filling its structure level and the template list.
+        
+        Args:
+            directory (str): Directory to scan
+            node (dict): Structure level of the directory
+            rel_parts (list): Path components of the directory relative to the role
+            templates (list): Template paths, relative to the templates directory
+        """
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError:
+            # Unreadable directories are skipped, as os.walk does
+            return
+        
+        # Prefix of the template paths found here, None outside templates/
+        template_prefix = None
+        if rel_parts[:1] == ["templates"]:
+            template_prefix = "".join(part + "/" for part in rel_parts[1:])
+        
+        # Like os.walk, handle the files of a directory before its subdirectories
+        subdirs = []
+        for entry in entries:
+            # DirEntry caches the file type, so these checks need no extra stat
+            if entry.is_dir():
+                # Do not descend into symlinked directories (os.walk default)
+                if not entry.is_symlink():
+                    subdirs.append(entry)
+            else:
+                if "__files__" not in node:
+                    node["__files__"] = []
+                node["__files__"].append(entry.name)
+                if template_prefix is not None:
+                    templates.append(template_prefix + entry.name)
+        
+        for entry in subdirs:
+            # Directory names (tasks, vars, templates...) recur across levels and roles
+            name = sys.intern(entry.name)
+            child = {}
+            self._scan(entry.path, child, rel_parts + [name], templates)
+            # Directories without any file are not part of the structure
+            if child:
+                node[name] = child
     
     def _read_yaml_file(self, file_path):
-        """Read and parse a YAML file."""
+        """Read and parse a YAML file, if it exists."""
+        if os.path.isfile(file_path):
+            return self._read_yaml_path_str(file_path)
+        return None
+    
+    def _read_yaml_path_str(self, path_str):
+        """Read and parse a YAML file already known to exist, given as a string path."""
         try:
-            if file_path.exists() and file_path.is_file():
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    return yaml.safe_load(content)
+            with open(path_str, 'r', encoding='utf-8') as f:
+                return yaml.load(f, Loader=SafeLoader)
         except Exception as e:
-            print(f"Warning: Unable to read {file_path}: {str(e)}")
+            print(f"Warning: Unable to read {path_str}: {str(e)}")
         return None
     
     def _read_metadata(self):
         """Read the meta/main.yml file."""
-        meta_path = self.role_path / "meta" / "main.yml"
-        return self._read_yaml_file(meta_path)
+        return self._read_yaml_file(self._meta_path)
     
     def _read_defaults(self):
         """Read the defaults/main.yml file."""
-        defaults_path = self.role_path / "defaults" / "main.yml"
-        return self._read_yaml_file(defaults_path)
+        return self._read_yaml_file(self._defaults_path)
     
-    def _read_tasks(self):
-        """Read task files."""
+    def _read_tasks(self, executor):
+        """Submit the task files to the executor; returns the futures by task name."""
         tasks = {}
-        tasks_dir = self.role_path / "tasks"
+        tasks_dir = self._tasks_dir
         
-        if tasks_dir.exists() and tasks_dir.is_dir():
-            main_tasks_path = tasks_dir / "main.yml"
-            tasks["main"] = self._read_yaml_file(main_tasks_path)
+        if os.path.isdir(tasks_dir):
+            main_tasks_path = os.path.join(tasks_dir, "main.yml")
+            tasks["main"] = executor.submit(self._read_yaml_file, main_tasks_path)
             
             # Search for other task files
-            for task_file in tasks_dir.glob("*.yml"):
-                if task_file.name != "main.yml":
-                    task_name = task_file.name
-                    tasks[task_name] = self._read_yaml_file(task_file)
+            try:
+                with os.scandir(tasks_dir) as it:
+                    for entry in it:
+                        if entry.name.endswith(".yml") and entry.name != "main.yml" and entry.is_file():
+                            tasks[entry.name] = executor.submit(self._read_yaml_path_str, entry.path)
+            except OSError:
+                # Unreadable directories are skipped, as in _scan
+                pass
         
         return tasks
     
-    def _find_templates(self, file_list):
-        """Identify template files."""
-        templates = []
-        templates_prefix = f"{self.role_name}/templates/"
-        
-        for filename in file_list:
-            if templates_prefix in filename:
-                template_path = filename.split(templates_prefix)[1]
-                templates.append(template_path)
-        
-        return templates
-    
     def _read_handlers(self):
         """Read the handlers/main.yml file."""
-        handlers_path = self.role_path / "handlers" / "main.yml"
-        return self._read_yaml_file(handlers_path)
+        return self._read_yaml_file(self._handlers_path)
     
-    def _read_vars(self):
-        """Read variable files."""
+    def _read_vars(self, executor):
+        """Submit the variable files to the executor; returns the futures by file name."""
         vars_data = {}
-        vars_dir = self.role_path / "vars"
+        vars_dir = self._vars_dir
         
-        if vars_dir.exists() and vars_dir.is_dir():
-            main_vars_path = vars_dir / "main.yml"
-            vars_data["main"] = self._read_yaml_file(main_vars_path)
+        if os.path.isdir(vars_dir):
+            main_vars_path = os.path.join(vars_dir, "main.yml")
+            vars_data["main"] = executor.submit(self._read_yaml_file, main_vars_path)
             
             # Search for other variable files
-            for var_file in vars_dir.glob("*.yml"):
-                if var_file.name != "main.yml":
-                    var_name = var_file.name
-                    vars_data[var_name] = self._read_yaml_file(var_file)
+            try:
+                with os.scandir(vars_dir) as it:
+                    for entry in it:
+                        if entry.name.endswith(".yml") and entry.name != "main.yml" and entry.is_file():
+                            vars_data[entry.name] = executor.submit(self._read_yaml_path_str, entry.path)
+            except OSError:
+                # Unreadable directories are skipped, as in _scan
+                pass
         
         return vars_data
     
     def generate_documentation(self):
         """Generate documentation based on extracted information."""
-        role_info = self.extract_role_info()
-        
-        if self.output_format == "markdown":
-            content = self._generate_markdown(role_info)
-        else:  # text
-            content = self._generate_text(role_info)
+        content = "\n".join(self._iter_documentation())
         
         if self.output_file:
-            with open(self.output_file, 'w', encoding='utf-8') as f:
-                f.write(content)
-            print(f"Documentation generated in {self.output_file}")
+            self._write_output_file((content,))
         
         return content
     
+    def write_documentation(self, stream=None):
+        """
+        Stream the documentation without building it in memory.
+        
+        The output file is written through a temporary file in the same
+        directory and only replaced once the whole document is rendered, so a
+        failure neither truncates an existing file nor leaves a partial one.
+        
+        Args:
+            stream: Text stream to write to (optional, defaults to the output
+                file, or to stdout when there is none)
+        """
+        if stream is None and not self.output_file:
+            stream = sys.stdout
+        
+        lines = self._iter_documentation()
+        
+        if stream is None:
+            self._write_output_file(lines)
+        else:
+            self._write_lines(stream, lines)
+    
+    def _write_output_file(self, lines):
+        """Write lines to the output file through a temporary file replaced on success."""
+        # Same directory as the output file, so os.replace stays atomic
+        tmp_path = f"{self.output_file}.{os.getpid()}.tmp"
+        try:
+            f = open(tmp_path, 'x', encoding='utf-8')
+        except OSError as e:
+            # Report the output file rather than the temporary one
+            raise OSError(e.errno, e.strerror, self.output_file) from e
+        
+        # From here on the temporary file is ours to remove on failure
+        try:
+            with f:
+                self._write_lines(f, lines)
+            os.replace(tmp_path, self.output_file)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        print(f"Documentation generated in {self.output_file}")
+    
+    def _write_lines(self, stream, lines):
+        """Write lines to stream, separated by newlines."""
+        separator = ""
+        for line in lines:
+            stream.write(separator)
+            stream.write(line)
+            separator = "\n"
+    
+    def _iter_documentation(self):
+        """Extract role information and yield the lines of the documentation."""
+        role_info = self.extract_role_info()
+        
+        if self.output_format == "markdown":
+            return self._iter_markdown(role_info)
+        return self._iter_text(role_info)
+    
+    def _dump_yaml(self, data):
+        """Serialize data to a YAML block."""
+        return yaml.dump(data, Dumper=SafeDumper, default_flow_style=False, sort_keys=False)
+    
+    def _non_empty_files(self, role_info):
+        """Return the non-empty variable files and the non-empty task files other than main."""
+        var_files = {k: v for k, v in role_info['vars'].items() if v}
+        other_tasks = {k: v for k, v in role_info['tasks'].items() if k != 'main' and v}
+        return var_files, other_tasks
+    
+    def _markdown_yaml_block(self, header, data):
+        """Return the lines of a Markdown section holding data as a fenced YAML block."""
+        return (header, "", "```yaml", self._dump_yaml(data), "```", "")
+    
+    def _text_yaml_block(self, header, underline, data):
+        """Return the lines of a text section holding data as a YAML block."""
+        return (header, underline) + self._text_yaml_body(data)
+    
+    def _text_yaml_body(self, data):
+        """Return the lines of data dumped as YAML in the text output."""
+        return ("", self._dump_yaml(data), "")
+    
     def _generate_markdown(self, role_info):
         """Generate documentation in Markdown format."""
-        lines = []
+        return "\n".join(self._iter_markdown(role_info))
+    
+    def _iter_markdown(self, role_info):
+        """Yield the lines of the Markdown documentation."""
+        # Each YAML block is dumped only when it is emitted
+        var_files, other_tasks = self._non_empty_files(role_info)
         
         # Title and description
-        lines.append(f"# Ansible Role: {role_info['name']}")
-        lines.append("")
+        yield f"# Ansible Role: {role_info['name']}"
+        yield ""
         
         # Description from metadata
         if role_info['metadata'] and 'galaxy_info' in role_info['metadata']:
             galaxy_info = role_info['metadata']['galaxy_info']
             if 'description' in galaxy_info:
-                lines.append(f"{galaxy_info['description']}")
-                lines.append("")
+                yield f"{galaxy_info['description']}"
+                yield ""
         
         # Metadata information
-        lines.append("## General Information")
-        lines.append("")
+        yield "## General Information"
+        yield ""
         
         if role_info['metadata'] and 'galaxy_info' in role_info['metadata']:
             galaxy_info = role_info['metadata']['galaxy_info']
             
             if 'author' in galaxy_info:
-                lines.append(f"**Author:** {galaxy_info['author']}")
+                yield f"**Author:** {galaxy_info['author']}"
             
             if 'license' in galaxy_info:
-                lines.append(f"**License:** {galaxy_info['license']}")
+                yield f"**License:** {galaxy_info['license']}"
             
             if 'min_ansible_version' in galaxy_info:
-                lines.append(f"**Minimum Ansible Version:** {galaxy_info['min_ansible_version']}")
+                yield f"**Minimum Ansible Version:** {galaxy_info['min_ansible_version']}"
             
             if 'platforms' in galaxy_info:
-                lines.append("")
-                lines.append("**Supported Platforms:**")
+                yield ""
+                yield "**Supported Platforms:**"
                 for platform in galaxy_info['platforms']:
-                    lines.append(f"- {platform.get('name', 'N/A')}")
+                    yield f"- {platform.get('name', 'N/A')}"
                     if 'versions' in platform:
                         versions = ", ".join(str(v) for v in platform['versions'])
-                        lines.append(f"  - Versions: {versions}")
+                        yield f"  - Versions: {versions}"
             
-            lines.append("")
+            yield ""
         
         # Default variables
         if role_info['defaults']:
-            lines.append("## Default Variables")
-            lines.append("")
-            lines.append("```yaml")
-            lines.append(yaml.dump(role_info['defaults'], default_flow_style=False, sort_keys=False))
-            lines.append("```")
-            lines.append("")
+            yield from self._markdown_yaml_block("## Default Variables", role_info['defaults'])
         
         # Variables (vars)
-        if role_info['vars'] and any(role_info['vars'].values()):
-            lines.append("## Variables")
-            lines.append("")
-            for var_file, var_content in role_info['vars'].items():
-                if var_content:
-                    lines.append(f"### {var_file}")
-                    lines.append("")
-                    lines.append("```yaml")
-                    lines.append(yaml.dump(var_content, default_flow_style=False, sort_keys=False))
-                    lines.append("```")
-                    lines.append("")
+        if var_files:
+            yield "## Variables"
+            yield ""
+            for var_file, var_content in var_files.items():
+                yield from self._markdown_yaml_block(f"### {var_file}", var_content)
         
         # Main tasks
         if role_info['tasks'] and 'main' in role_info['tasks'] and role_info['tasks']['main']:
-            lines.append("## Main Tasks")
-            lines.append("")
+            yield "## Main Tasks"
+            yield ""
             
             tasks = role_info['tasks']['main']
             for idx, task in enumerate(tasks if isinstance(tasks, list) else []):
                 if 'name' in task:
-                    lines.append(f"- {task['name']}")
+                    yield f"- {task['name']}"
             
-            lines.append("")
+            yield ""
         
         # Other task files
-        other_tasks = {k: v for k, v in role_info['tasks'].items() if k != 'main' and v}
         if other_tasks:
-            lines.append("## Other Tasks")
-            lines.append("")
+            yield "## Other Tasks"
+            yield ""
             
             for task_file, task_content in other_tasks.items():
-                lines.append(f"### {task_file}")
-                lines.append("")
-                lines.append("```yaml")
-                lines.append(yaml.dump(task_content, default_flow_style=False, sort_keys=False))
-                lines.append("```")
-                lines.append("")
+                yield from self._markdown_yaml_block(f"### {task_file}", task_content)
         
         # Handlers
         if role_info['handlers']:
-            lines.append("## Handlers")
-            lines.append("")
-            lines.append("```yaml")
-            lines.append(yaml.dump(role_info['handlers'], default_flow_style=False, sort_keys=False))
-            lines.append("```")
-            lines.append("")
+            yield from self._markdown_yaml_block("## Handlers", role_info['handlers'])
         
         # Templates
         if role_info['templates']:
-            lines.append("## Templates")
-            lines.append("")
+            yield "## Templates"
+            yield ""
             for template in role_info['templates']:
-                lines.append(f"- `{template}`")
-            lines.append("")
+                yield f"- `{template}`"
+            yield ""
         
         # Role structure
-        lines.append("## Role Structure")
-        lines.append("")
-        lines.append("```")
+        yield "## Role Structure"
+        yield ""
+        yield "```"
         structure_text = self._format_structure(role_info['structure'])
-        lines.append(structure_text)
-        lines.append("```")
+        yield structure_text
+        yield "```"
         
         # Dependencies
         if role_info['metadata'] and 'dependencies' in role_info['metadata']:
             dependencies = role_info['metadata']['dependencies']
             if dependencies:
-                lines.append("")
-                lines.append("## Dependencies")
-                lines.append("")
+                yield ""
+                yield "## Dependencies"
+                yield ""
                 
                 for dep in dependencies:
                     if isinstance(dep, str):
-                        lines.append(f"- {dep}")
+                        yield f"- {dep}"
                     elif isinstance(dep, dict) and 'role' in dep:
-                        lines.append(f"- {dep['role']}")
+                        yield f"- {dep['role']}"
                         # Add other details if available
                         for key, value in dep.items():
                             if key != 'role':
-                                lines.append(f"  - {key}: {value}")
-        
-        return "\n".join(lines)
+                                yield f"  - {key}: {value}"
     
     def _generate_text(self, role_info):
         """Generate documentation in text format."""
-        lines = []
+        return "\n".join(self._iter_text(role_info))
+    
+    def _iter_text(self, role_info):
+        """Yield the lines of the text documentation."""
+        # Each YAML block is dumped only when it is emitted
+        var_files, other_tasks = self._non_empty_files(role_info)
         
         # Title and description
-        lines.append(f"ANSIBLE ROLE: {role_info['name'].upper()}")
-        lines.append("=" * (len(role_info['name']) + 14))
-        lines.append("")
+        yield f"ANSIBLE ROLE: {role_info['name'].upper()}"
+        yield "=" * (len(role_info['name']) + 14)
+        yield ""
         
         # Description from metadata
         if role_info['metadata'] and 'galaxy_info' in role_info['metadata']:
             galaxy_info = role_info['metadata']['galaxy_info']
             if 'description' in galaxy_info:
-                lines.append(f"{galaxy_info['description']}")
-                lines.append("")
+                yield f"{galaxy_info['description']}"
+                yield ""
         
         # Metadata information
-        lines.append("GENERAL INFORMATION")
-        lines.append("---------------------")
-        lines.append("")
+        yield "GENERAL INFORMATION"
+        yield "---------------------"
+        yield ""
         
         if role_info['metadata'] and 'galaxy_info' in role_info['metadata']:
             galaxy_info = role_info['metadata']['galaxy_info']
             
             if 'author' in galaxy_info:
-                lines.append(f"Author: {galaxy_info['author']}")
+                yield f"Author: {galaxy_info['author']}"
             
             if 'license' in galaxy_info:
-                lines.append(f"License: {galaxy_info['license']}")
+                yield f"License: {galaxy_info['license']}"
             
             if 'min_ansible_version' in galaxy_info:
-                lines.append(f"Minimum Ansible Version: {galaxy_info['min_ansible_version']}")
+                yield f"Minimum Ansible Version: {galaxy_info['min_ansible_version']}"
             
             if 'platforms' in galaxy_info:
-                lines.append("")
-                lines.append("Supported Platforms:")
+                yield ""
+                yield "Supported Platforms:"
                 for platform in galaxy_info['platforms']:
-                    lines.append(f"- {platform.get('name', 'N/A')}")
+                    yield f"- {platform.get('name', 'N/A')}"
                     if 'versions' in platform:
                         versions = ", ".join(str(v) for v in platform['versions'])
-                        lines.append(f"  - Versions: {versions}")
+                        yield f"  - Versions: {versions}"
             
-            lines.append("")
+            yield ""
         
         # Default variables
         if role_info['defaults']:
-            lines.append("DEFAULT VARIABLES")
-            lines.append("--------------------")
-            lines.append("")
-            yaml_content = yaml.dump(role_info['defaults'], default_flow_style=False, sort_keys=False)
-            lines.append(yaml_content)
-            lines.append("")
+            yield from self._text_yaml_block("DEFAULT VARIABLES", "--------------------", role_info['defaults'])
         
         # Variables (vars)
-        if role_info['vars'] and any(role_info['vars'].values()):
-            lines.append("VARIABLES")
-            lines.append("---------")
-            lines.append("")
-            for var_file, var_content in role_info['vars'].items():
-                if var_content:
-                    lines.append(f"{var_file}:")
-                    lines.append("-" * (len(var_file) + 1))
-                    lines.append("")
-                    yaml_content = yaml.dump(var_content, default_flow_style=False, sort_keys=False)
-                    lines.append(yaml_content)
-                    lines.append("")
+        if var_files:
+            yield "VARIABLES"
+            yield "---------"
+            yield ""
+            for var_file, var_content in var_files.items():
+                yield from self._text_yaml_block(f"{var_file}:", "-" * (len(var_file) + 1), var_content)
         
         # Main tasks
         if role_info['tasks'] and 'main' in role_info['tasks'] and role_info['tasks']['main']:
-            lines.append("MAIN TASKS")
-            lines.append("-----------------")
-            lines.append("")
+            yield "MAIN TASKS"
+            yield "-----------------"
+            yield ""
             
             tasks = role_info['tasks']['main']
             for idx, task in enumerate(tasks if isinstance(tasks, list) else []):
                 if 'name' in task:
-                    lines.append(f"- {task['name']}")
+                    yield f"- {task['name']}"
             
-            lines.append("")
-            yaml_content = yaml.dump(tasks, default_flow_style=False, sort_keys=False)
-            lines.append(yaml_content)
-            lines.append("")
+            yield from self._text_yaml_body(tasks)
         
         # Other task files
-        other_tasks = {k: v for k, v in role_info['tasks'].items() if k != 'main' and v}
         if other_tasks:
-            lines.append("OTHER TASKS")
-            lines.append("-------------")
-            lines.append("")
+            yield "OTHER TASKS"
+            yield "-------------"
+            yield ""
             
             for task_file, task_content in other_tasks.items():
-                lines.append(f"{task_file}:")
-                lines.append("-" * (len(task_file) + 1))
-                lines.append("")
-                yaml_content = yaml.dump(task_content, default_flow_style=False, sort_keys=False)
-                lines.append(yaml_content)
-                lines.append("")
+                yield from self._text_yaml_block(f"{task_file}:", "-" * (len(task_file) + 1), task_content)
         
         # Handlers
         if role_info['handlers']:
-            lines.append("HANDLERS")
-            lines.append("--------")
-            lines.append("")
-            yaml_content = yaml.dump(role_info['handlers'], default_flow_style=False, sort_keys=False)
-            lines.append(yaml_content)
-            lines.append("")
+            yield from self._text_yaml_block("HANDLERS", "--------", role_info['handlers'])
         
         # Templates
         if role_info['templates']:
-            lines.append("TEMPLATES")
-            lines.append("---------")
-            lines.append("")
+            yield "TEMPLATES"
+            yield "---------"
+            yield ""
             for template in role_info['templates']:
-                lines.append(f"- {template}")
-            lines.append("")
+                yield f"- {template}"
+            yield ""
         
         # Role structure
-        lines.append("STRUCTURE DU RÔLE")
-        lines.append("----------------")
-        lines.append("")
+        yield "STRUCTURE DU RÔLE"
+        yield "----------------"
+        yield ""
         structure_text = self._format_structure(role_info['structure'])
-        lines.append(structure_text)
+        yield structure_text
         
         # Dependencies
         if role_info['metadata'] and 'dependencies' in role_info['metadata']:
             dependencies = role_info['metadata']['dependencies']
             if dependencies:
-                lines.append("")
-                lines.append("DEPENDENCIES")
-                lines.append("-----------")
-                lines.append("")
+                yield ""
+                yield "DEPENDENCIES"
+                yield "-----------"
+                yield ""
                 
                 for dep in dependencies:
                     if isinstance(dep, str):
-                        lines.append(f"- {dep}")
+                        yield f"- {dep}"
                     elif isinstance(dep, dict) and 'role' in dep:
-                        lines.append(f"- {dep['role']}")
+                        yield f"- {dep['role']}"
                         # Ajouter d'autres détails si disponibles
                         for key, value in dep.items():
                             if key != 'role':
-                                lines.append(f"  - {key}: {value}")
-        
-        return "\n".join(lines)
+                                yield f"  - {key}: {value}"
     
-    def _format_structure(self, structure, prefix="", is_last=True, indent=""):
-        """Format the role structure for display."""
-        lines = []
-        
-        # Process files before directories
-        files = structure.pop("__files__", []) if "__files__" in structure else []
+    def _format_structure(self, structure):
+        """
+        Format the role structure for display.
         
-        # Determine keys (directories) and sort them
-        items = list(structure.items())
+        The tree is walked with an explicit stack rather than recursively: a
+        stack entry is either a ready line or a (node, indent) pair still to
+        expand, with indent None for the top level.
+        """
+        lines = []
+        stack = [(structure, None)]
         
-        for i, (key, value) in enumerate(items):
-            is_last_dir = (i == len(items) - 1 and not files)
+        while stack:
+            entry = stack.pop()
+            if isinstance(entry, str):
+                lines.append(entry)
+                continue
             
-            # Add line for directory
-            if not prefix:  # First level
-                lines.append(f"{key}/")
-                new_indent = "    "
-            else:
-                branch = "└── " if is_last_dir else "├── "
-                lines.append(f"{indent}{branch}{key}/")
-                new_indent = indent + ("    " if is_last_dir else "│   ")
+            node, indent = entry
+            is_root = indent is None
+            pending = []
             
-            # Recursively add subdirectories
-            if value:
-                sub_structure = self._format_structure(value, f"{prefix}/{key}", is_last_dir, new_indent)
-                lines.append(sub_structure)
-        
-        # Add files
-        for i, filename in enumerate(sorted(files)):
-            is_last_file = (i == len(files) - 1)
-            branch = "└── " if is_last_file else "├── "
+            # Files are listed after directories; the structure itself is left untouched
+            files = node.get("__files__") or ()
             
-            if not prefix:  # First level
-                lines.append(f"{filename}")
-            else:
-                lines.append(f"{indent}{branch}{filename}")
+            # Determine keys (directories) and sort them
+            items = sorted(
+                ((key, value) for key, value in node.items() if key != "__files__"),
+                key=lambda item: item[0]
+            )
+            
+            for i, (key, value) in enumerate(items):
+                is_last_dir = (i == len(items) - 1 and not files)
+                
+                # Add line for directory
+                if is_root:  # First level
+                    pending.append(f"{key}/")
+                    new_indent = "    "
+                else:
+                    branch = "└── " if is_last_dir else "├── "
+                    pending.append(f"{indent}{branch}{key}/")
+                    new_indent = indent + ("    " if is_last_dir else "│   ")
+                
+                # Expand subdirectories right after their own line
+                if value:
+                    pending.append((value, new_indent))
+            
+            # Add files
+            for i, filename in enumerate(sorted(files)):
+                is_last_file = (i == len(files) - 1)
+                branch = "└── " if is_last_file else "├── "
+                
+                if is_root:  # First level
+                    pending.append(f"{filename}")
+                else:
+                    pending.append(f"{indent}{branch}{filename}")
+            
+            # Push in reverse so the entries pop in display order
+            stack.extend(reversed(pending))
         
         return "\n".join(lines)
 
@@ -540,10 +621,9 @@ def main():
             output_format=args.format, 
             output_file=args.output
         )
-        doc = generator.generate_documentation()
-        
+        generator.write_documentation()
         if not args.output:
-            print(doc)
+            print()
             
     except Exception as e:
         print(f"Error: {str(e)}", file=sys.stderr)
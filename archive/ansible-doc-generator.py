@@ -26,19 +26,96 @@ Script to generate Markdown/text documentation from a zip file
 containing the structure of an Ansible role.
 """
 
+import io
 import os
 import sys
+import copy
+import json
+import hashlib
 import zipfile
 import yaml
-import argparse
-import re
-from pathlib import Path
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Prefer the libyaml C bindings, fall back to the pure-Python implementation
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
+
+# galaxy_info fields listed in the general information section, with their labels
+GALAXY_INFO_FIELDS = (
+    ("author", "Author"),
+    ("license", "License"),
+    ("min_ansible_version", "Minimum Ansible Version"),
+)
+
+# Document templates: each optional block is either "" or complete lines
+MARKDOWN_TEMPLATE = (
+    "# Ansible Role: {name}\n"
+    "\n"
+    "{description}"
+    "## General Information\n"
+    "\n"
+    "{general_info}"
+    "{defaults}"
+    "{variables}"
+    "{main_tasks}"
+    "{other_tasks}"
+    "{handlers}"
+    "{templates}"
+    "{structure}"
+    "{dependencies}"
+)
+
+TEXT_TEMPLATE = (
+    "ANSIBLE ROLE: {name}\n"
+    "{title_rule}\n"
+    "\n"
+    "{description}"
+    "GENERAL INFORMATION\n"
+    "---------------------\n"
+    "\n"
+    "{general_info}"
+    "{defaults}"
+    "{variables}"
+    "{main_tasks}"
+    "{other_tasks}"
+    "{handlers}"
+    "{templates}"
+    "{structure}"
+    "{dependencies}"
+)
+
+# Optional blocks of both templates, empty unless the section has content
+TEMPLATE_BLOCKS = (
+    "description", "general_info", "defaults", "variables", "main_tasks",
+    "other_tasks", "handlers", "templates", "structure", "dependencies",
+)
+
+
+# Parsed YAML payloads keyed by the SHA-1 of their raw bytes, so identical
+# files across runs or roles are only parsed once
+_YAML_CACHE = OrderedDict()
+_YAML_CACHE_SIZE = 128
+
+# Zips up to this size are loaded in memory before being opened
+_IN_MEMORY_MAX_SIZE = 50 * 1024 * 1024
+
+# Upper bound on threads used to parse sibling task/vars files
+_PARSE_WORKERS = 8
+
+# YAML entries larger than this are parsed straight from the zip stream
+_STREAM_MIN_SIZE = 1024 * 1024
+
+# Layout version of the JSON role info sidecar, to bump whenever role_info changes shape
+_ROLE_INFO_CACHE_VERSION = 1
 
 
 class AnsibleRoleDocGenerator:
     """Documentation generator for Ansible roles."""
 
-    def __init__(self, zip_path, output_format="markdown", output_file=None):
+    def __init__(self, zip_path, output_format="markdown", output_file=None, include_structure=True):
         """
         Initialize the generator.
         
@@ -46,21 +123,33 @@ class AnsibleRoleDocGenerator:
             zip_path (str): Path to the Ansible role zip file
             output_format (str): Output format ("markdown" or "text")
             output_file (str): Output file path (optional)
+            include_structure (bool): Analyze and render the role structure
         """
         self.zip_path = zip_path
         self.output_format = output_format.lower()
         self.output_file = output_file
+        self.include_structure = include_structure
         self.role_name = ""
-        self.role_structure = {}
+        self.role_structure = []
+        self._prefixes = {}
         
         # Check that the output format is valid
-        if self.output_format not in ["markdown", "text"]:
+        renderers = {"markdown": self._generate_markdown, "text": self._generate_text}
+        if self.output_format not in renderers:
             raise ValueError("Output format must be 'markdown' or 'text'")
+        
+        # Bind the renderer once instead of dispatching on every call
+        self._render = renderers[self.output_format]
     
-    def extract_role_info(self):
-        """Extract role information from the zip file."""
+    def extract_role_info(self, zip_data=None):
+        """
+        Extract role information from the zip file.
+        
+        Args:
+            zip_data (bytes): Contents of the zip file, if already read (optional)
+        """
         try:
-            with zipfile.ZipFile(self.zip_path, 'r') as zip_ref:
+            with zipfile.ZipFile(self._open_zip_source(zip_data), 'r') as zip_ref:
                 file_list = zip_ref.namelist()
                 
                 # Determine role name (based on first directory)
@@ -69,16 +158,26 @@ class AnsibleRoleDocGenerator:
                     if first_item and first_item != '.':
                         self.role_name = first_item
                 
-                # Extract role structure
-                self.role_structure = self._analyze_structure(file_list)
+                # Precompute the role-relative prefixes and paths used below
+                self._prefixes = self._build_prefixes()
+                
+                # Select the entries we need in a single pass over the central directory
+                yaml_entries, template_files = self._collect_entries(zip_ref)
+                
+                # Extract role structure (only consumed by the structure section)
+                if self.include_structure:
+                    self.role_structure = self._analyze_structure(file_list)
+                
+                # Read and parse every needed YAML file in one batch
+                parsed = self._read_yaml_files(zip_ref, yaml_entries)
                 
                 # Get content of important files
-                metadata = self._read_metadata(zip_ref)
-                defaults = self._read_defaults(zip_ref)
-                tasks = self._read_tasks(zip_ref)
-                templates = self._find_templates(file_list)
-                handlers = self._read_handlers(zip_ref)
-                vars_data = self._read_vars(zip_ref)
+                metadata = self._read_metadata(parsed)
+                defaults = self._read_defaults(parsed)
+                tasks = self._read_tasks(parsed)
+                templates = self._find_templates(template_files)
+                handlers = self._read_handlers(parsed)
+                vars_data = self._read_vars(parsed)
                 
                 return {
                     "name": self.role_name,
@@ -93,9 +192,31 @@ class AnsibleRoleDocGenerator:
         except zipfile.BadZipFile:
             raise Exception(f"Error: {self.zip_path} is not a valid zip file")
     
+    def _open_zip_source(self, zip_data=None):
+        """Return the zip to open: an in-memory copy for small files, else the path."""
+        if zip_data is None:
+            zip_data = self._read_zip_data()
+        if zip_data is None:
+            return self.zip_path
+        return io.BytesIO(zip_data)
+    
+    def _read_zip_data(self):
+        """Read the whole zip file if it is small enough to be held in memory, else None."""
+        if os.path.getsize(self.zip_path) > _IN_MEMORY_MAX_SIZE:
+            return None
+        
+        # One bulk read instead of many small seeks and reads
+        with open(self.zip_path, 'rb') as f:
+            return f.read()
+    
     def _analyze_structure(self, file_list):
-        """Analyze the role structure from file paths."""
-        structure = {}
+        """
+        Analyze the role structure from file paths.
+        
+        Returns the role-relative paths (directories ending with '/') sorted
+        in display order, see _structure_key().
+        """
+        paths = []
         
         for file_path in file_list:
             parts = file_path.split('/')
@@ -103,424 +224,466 @@ class AnsibleRoleDocGenerator:
             if len(parts) > 1 and parts[0] == self.role_name:
                 parts = parts[1:]
             
-            current_level = structure
-            for i, part in enumerate(parts):
-                if i == len(parts) - 1 and part:  # If it's a file (not an empty directory)
-                    if "__files__" not in current_level:
-                        current_level["__files__"] = []
-                    current_level["__files__"].append(part)
-                elif part:  # If it's a directory
-                    if part not in current_level:
-                        current_level[part] = {}
-                    current_level = current_level[part]
-        
-        return structure
-    
-    def _read_yaml_file(self, zip_ref, file_path):
-        """Read and parse a YAML file in the zip."""
-        try:
-            if file_path in zip_ref.namelist():
-                content = zip_ref.read(file_path).decode('utf-8')
-                return yaml.safe_load(content)
-        except Exception as e:
-            print(f"Warning: Unable to read {file_path}: {str(e)}")
-        return None
+            names = [part for part in parts if part]
+            if names:
+                is_dir = not parts[-1]  # Directory entries end with '/'
+                paths.append("/".join(names) + ("/" if is_dir else ""))
+        
+        paths.sort(key=self._structure_key)
+        return paths
+    
+    def _structure_key(self, path):
+        """Sort key listing directories before files at each level, both alphabetically."""
+        parts = path.rstrip('/').split('/')
+        key = [(0, part) for part in parts[:-1]]
+        key.append((0 if path.endswith('/') else 1, parts[-1]))
+        return key
+    
+    def _build_prefixes(self):
+        """Build the zip paths of the role directories and main files."""
+        return {
+            "tasks": f"{self.role_name}/tasks/",
+            "vars": f"{self.role_name}/vars/",
+            "templates": f"{self.role_name}/templates/",
+            "meta": f"{self.role_name}/meta/main.yml",
+            "defaults": f"{self.role_name}/defaults/main.yml",
+            "handlers": f"{self.role_name}/handlers/main.yml",
+            "tasks_main": f"{self.role_name}/tasks/main.yml",
+            "vars_main": f"{self.role_name}/vars/main.yml",
+        }
+    
+    def _collect_entries(self, zip_ref):
+        """Collect the YAML entries to parse and the template files in one pass."""
+        prefixes = self._prefixes
+        main_files = {prefixes["meta"], prefixes["defaults"], prefixes["handlers"]}
+        dir_prefixes = (prefixes["tasks"], prefixes["vars"])
+        yaml_entries = {}
+        template_files = []
+        
+        for info in zip_ref.infolist():
+            filename = info.filename
+            if filename in main_files or filename.startswith(dir_prefixes):
+                yaml_entries[filename] = info
+            elif filename.startswith(prefixes["templates"]):
+                template_files.append(filename)
+        
+        return yaml_entries, template_files
+    
+    def _read_yaml_files(self, zip_ref, entries):
+        """Read and parse YAML entries of the zip, parsing them in parallel."""
+        results = {}
+        pending = []
+        
+        # ZipFile is not safe for concurrent reads: fetch the payloads serially
+        for file_path, info in entries.items():
+            results[file_path] = None
+            try:
+                if info.file_size > _STREAM_MIN_SIZE:
+                    # Parse large files as they are decompressed, never holding the whole payload;
+                    # they bypass the cache, which would keep and copy the whole document
+                    with zip_ref.open(info) as fp:
+                        results[file_path] = yaml.load(fp, Loader=SafeLoader)
+                    continue
+                
+                # libyaml detects the encoding and parses the raw bytes directly
+                content = zip_ref.read(info)
+            except Exception as e:
+                print(f"Warning: Unable to read {file_path}: {str(e)}")
+                continue
+            
+            # The CRC from the central directory is no content hash: key on the bytes themselves
+            key = hashlib.sha1(content).digest()
+            if key in _YAML_CACHE:
+                _YAML_CACHE.move_to_end(key)
+                results[file_path] = copy.deepcopy(_YAML_CACHE[key])
+                continue
+            pending.append((file_path, key, content))
+        
+        if not pending:
+            return results
+        
+        # Parse the payloads, the heavier step, on a thread pool
+        with ThreadPoolExecutor(max_workers=min(_PARSE_WORKERS, len(pending))) as executor:
+            futures = [
+                (file_path, key, executor.submit(yaml.load, content, Loader=SafeLoader))
+                for file_path, key, content in pending
+            ]
+            for file_path, key, future in futures:
+                try:
+                    data = future.result()
+                except Exception as e:
+                    print(f"Warning: Unable to read {file_path}: {str(e)}")
+                    continue
+                results[file_path] = self._cache_yaml(key, data)
+        
+        return results
+    
+    def _cache_yaml(self, key, data):
+        """Store parsed YAML in the cache and return a copy for the caller."""
+        _YAML_CACHE[key] = data
+        if len(_YAML_CACHE) > _YAML_CACHE_SIZE:
+            _YAML_CACHE.popitem(last=False)
+        return copy.deepcopy(data)
     
-    def _read_metadata(self, zip_ref):
-        """Read the meta/main.yml file."""
-        meta_path = f"{self.role_name}/meta/main.yml"
-        return self._read_yaml_file(zip_ref, meta_path)
+    def _read_metadata(self, parsed):
+        """Get the parsed meta/main.yml file."""
+        return parsed.get(self._prefixes["meta"])
     
-    def _read_defaults(self, zip_ref):
-        """Read the defaults/main.yml file."""
-        defaults_path = f"{self.role_name}/defaults/main.yml"
-        return self._read_yaml_file(zip_ref, defaults_path)
+    def _read_defaults(self, parsed):
+        """Get the parsed defaults/main.yml file."""
+        return parsed.get(self._prefixes["defaults"])
     
-    def _read_tasks(self, zip_ref):
-        """Read task files."""
+    def _read_tasks(self, parsed):
+        """Get the parsed task files."""
         tasks = {}
-        main_tasks_path = f"{self.role_name}/tasks/main.yml"
-        tasks["main"] = self._read_yaml_file(zip_ref, main_tasks_path)
+        main_tasks_path = self._prefixes["tasks_main"]
+        tasks["main"] = parsed.get(main_tasks_path)
         
-        # Search for other task files
-        for filename in zip_ref.namelist():
-            if filename.startswith(f"{self.role_name}/tasks/") and filename != main_tasks_path:
+        # Collect the other task files
+        for filename, content in parsed.items():
+            if filename.startswith(self._prefixes["tasks"]) and filename != main_tasks_path:
                 task_name = os.path.basename(filename)
-                tasks[task_name] = self._read_yaml_file(zip_ref, filename)
+                tasks[task_name] = content
         
         return tasks
     
-    def _find_templates(self, file_list):
+    def _find_templates(self, template_files):
         """Identify template files."""
         templates = []
-        templates_prefix = f"{self.role_name}/templates/"
+        prefix_len = len(self._prefixes["templates"])
         
-        for filename in file_list:
-            if filename.startswith(templates_prefix) and not filename.endswith('/'):
-                template_path = filename[len(templates_prefix):]
+        for filename in template_files:
+            if not filename.endswith('/'):
+                template_path = filename[prefix_len:]
                 templates.append(template_path)
         
         return templates
     
-    def _read_handlers(self, zip_ref):
-        """Read the handlers/main.yml file."""
-        handlers_path = f"{self.role_name}/handlers/main.yml"
-        return self._read_yaml_file(zip_ref, handlers_path)
+    def _read_handlers(self, parsed):
+        """Get the parsed handlers/main.yml file."""
+        return parsed.get(self._prefixes["handlers"])
     
-    def _read_vars(self, zip_ref):
-        """Read variable files."""
+    def _read_vars(self, parsed):
+        """Get the parsed variable files."""
         vars_data = {}
-        vars_path = f"{self.role_name}/vars/main.yml"
-        vars_data["main"] = self._read_yaml_file(zip_ref, vars_path)
+        vars_path = self._prefixes["vars_main"]
+        vars_data["main"] = parsed.get(vars_path)
         
-        # Search for other variable files
-        for filename in zip_ref.namelist():
-            if filename.startswith(f"{self.role_name}/vars/") and filename != vars_path:
+        # Collect the other variable files
+        for filename, content in parsed.items():
+            if filename.startswith(self._prefixes["vars"]) and filename != vars_path:
                 var_name = os.path.basename(filename)
-                vars_data[var_name] = self._read_yaml_file(zip_ref, filename)
+                vars_data[var_name] = content
         
         return vars_data
     
     def generate_documentation(self):
         """Generate documentation based on extracted information."""
-        role_info = self.extract_role_info()
+        zip_data = None
+        zip_digest = None
+        if self._cache_path():
+            # Hash the zip once, for both the sidecar lookup and its refresh, from
+            # the bytes the extraction reuses on a miss
+            zip_data = self._read_zip_data()
+            zip_digest = self._zip_digest(zip_data)
         
-        if self.output_format == "markdown":
-            content = self._generate_markdown(role_info)
-        else:  # text
-            content = self._generate_text(role_info)
+        role_info = self._load_role_info_cache(zip_digest)
+        if role_info is None:
+            role_info = self.extract_role_info(zip_data)
+            self._save_role_info_cache(role_info, zip_digest)
+        
+        content = self._render(role_info)
         
         if self.output_file:
+            # The document is also returned as str, so it is encoded exactly once here
             with open(self.output_file, 'w', encoding='utf-8') as f:
                 f.write(content)
             print(f"Documentation generated in {self.output_file}")
         
         return content
     
+    def _cache_path(self):
+        """Path of the JSON sidecar holding the parsed role info (only with an output file)."""
+        if self.output_file:
+            return f"{self.output_file}.role_info.json"
+        return None
+    
+    def _zip_digest(self, zip_data=None):
+        """Compute the SHA-256 of the zip file, from its bytes when already read."""
+        if zip_data is not None:
+            return hashlib.sha256(zip_data).hexdigest()
+        
+        sha = hashlib.sha256()
+        with open(self.zip_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                sha.update(chunk)
+        return sha.hexdigest()
+    
+    def _load_role_info_cache(self, zip_digest):
+        """Return the cached role info if the sidecar matches the current zip and layout."""
+        cache_path = self._cache_path()
+        if not cache_path or not os.path.isfile(cache_path):
+            return None
+        
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            # A cache written without the structure cannot serve a run that needs it
+            has_structure = cache.get("include_structure") or not self.include_structure
+            if (cache.get("version") == _ROLE_INFO_CACHE_VERSION and has_structure
+                    and cache.get("zip_sha256") == zip_digest):
+                self.role_name = cache["role_info"]["name"]
+                self.role_structure = cache["role_info"]["structure"]
+                return cache["role_info"]
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            print(f"Warning: Ignoring cache {cache_path}: {str(e)}")
+        return None
+    
+    def _save_role_info_cache(self, role_info, zip_digest):
+        """Write the role info to the JSON sidecar, keyed by the zip hash."""
+        cache_path = self._cache_path()
+        if not cache_path:
+            return
+        
+        # Skip data JSON cannot represent faithfully (dates, non-string keys...)
+        try:
+            payload = json.dumps({
+                "version": _ROLE_INFO_CACHE_VERSION,
+                "zip_sha256": zip_digest,
+                "include_structure": self.include_structure,
+                "role_info": role_info
+            })
+            if json.loads(payload)["role_info"] != role_info:
+                return
+        except (TypeError, ValueError):
+            return
+        
+        try:
+            with open(cache_path, 'w', encoding='utf-8') as f:
+                f.write(payload)
+        except OSError as e:
+            print(f"Warning: Unable to write cache {cache_path}: {str(e)}")
+    
+    def _dump_yaml(self, data):
+        """Dump data to a YAML block."""
+        return yaml.dump(data, Dumper=SafeDumper, default_flow_style=False, sort_keys=False)
+    
+    def _extract_galaxy_rows(self, galaxy_info):
+        """Extract the (label, value) rows of the general information section."""
+        return [(label, galaxy_info[key]) for key, label in GALAXY_INFO_FIELDS if key in galaxy_info]
+    
+    def _extract_platforms(self, galaxy_info):
+        """Extract the (name, versions) of the supported platforms; versions may be None."""
+        platforms = []
+        for platform in galaxy_info['platforms']:
+            versions = None
+            if 'versions' in platform:
+                versions = ", ".join(str(v) for v in platform['versions'])
+            platforms.append((platform.get('name', 'N/A'), versions))
+        return platforms
+    
+    def _iter_galaxy_info(self, galaxy_info, label_format):
+        """Yield the general information lines, labels being rendered with label_format."""
+        for label, value in self._extract_galaxy_rows(galaxy_info):
+            yield f"{label_format.format(label)} {value}"
+        
+        if 'platforms' in galaxy_info:
+            yield ""
+            yield label_format.format("Supported Platforms")
+            for name, versions in self._extract_platforms(galaxy_info):
+                yield f"- {name}"
+                if versions is not None:
+                    yield f"  - Versions: {versions}"
+        
+        yield ""
+    
+    def _block(self, lines):
+        """Join lines into a template block, each line ending with a newline."""
+        return "".join(f"{line}\n" for line in lines)
+    
+    def _iter_task_names(self, tasks):
+        """Yield the main task names as list items."""
+        for task in tasks if isinstance(tasks, list) else []:
+            if 'name' in task:
+                yield f"- {task['name']}"
+    
+    def _iter_dependencies(self, dependencies):
+        """Yield the dependency lines."""
+        for dep in dependencies:
+            if isinstance(dep, str):
+                yield f"- {dep}"
+            elif isinstance(dep, dict) and 'role' in dep:
+                yield f"- {dep['role']}"
+                # Add other details if available
+                for key, value in dep.items():
+                    if key != 'role':
+                        yield f"  - {key}: {value}"
+    
+    def _common_context(self, role_info):
+        """Extract the values shared by both templates."""
+        metadata = role_info['metadata'] if isinstance(role_info['metadata'], dict) else {}
+        galaxy_info = metadata.get('galaxy_info')
+        tasks = role_info['tasks']
+        return {
+            "name": role_info['name'],
+            "galaxy_info": galaxy_info,
+            # A null description is still rendered, as 'None'
+            "has_description": galaxy_info is not None and 'description' in galaxy_info,
+            "vars": {k: v for k, v in role_info['vars'].items() if v} if role_info['vars'] else {},
+            "main_tasks": tasks['main'] if tasks and 'main' in tasks and tasks['main'] else None,
+            "other_tasks": {k: v for k, v in tasks.items() if k != 'main' and v},
+            "dependencies": metadata.get('dependencies'),
+        }
+    
     def _generate_markdown(self, role_info):
         """Generate documentation in Markdown format."""
-        lines = []
+        common = self._common_context(role_info)
+        galaxy_info = common["galaxy_info"]
+        ctx = dict.fromkeys(TEMPLATE_BLOCKS, "")
+        ctx["name"] = common["name"]
         
-        # Title and description
-        lines.append(f"# Ansible Role: {role_info['name']}")
-        lines.append("")
+        if common["has_description"]:
+            ctx["description"] = f"{common['galaxy_info']['description']}\n\n"
         
-        # Description from metadata
-        if role_info['metadata'] and 'galaxy_info' in role_info['metadata']:
-            galaxy_info = role_info['metadata']['galaxy_info']
-            if 'description' in galaxy_info:
-                lines.append(f"{galaxy_info['description']}")
-                lines.append("")
+        if galaxy_info is not None:
+            ctx["general_info"] = self._block(self._iter_galaxy_info(galaxy_info, "**{}:**"))
         
-        # Metadata information
-        lines.append("## General Information")
-        lines.append("")
+        if role_info['defaults']:
+            ctx["defaults"] = f"## Default Variables\n\n```yaml\n{self._dump_yaml(role_info['defaults'])}\n```\n\n"
         
-        if role_info['metadata'] and 'galaxy_info' in role_info['metadata']:
-            galaxy_info = role_info['metadata']['galaxy_info']
-            
-            if 'author' in galaxy_info:
-                lines.append(f"**Author:** {galaxy_info['author']}")
-            
-            if 'license' in galaxy_info:
-                lines.append(f"**License:** {galaxy_info['license']}")
-            
-            if 'min_ansible_version' in galaxy_info:
-                lines.append(f"**Minimum Ansible Version:** {galaxy_info['min_ansible_version']}")
-            
-            if 'platforms' in galaxy_info:
-                lines.append("")
-                lines.append("**Supported Platforms:**")
-                for platform in galaxy_info['platforms']:
-                    lines.append(f"- {platform.get('name', 'N/A')}")
-                    if 'versions' in platform:
-                        versions = ", ".join(str(v) for v in platform['versions'])
-                        lines.append(f"  - Versions: {versions}")
-            
-            lines.append("")
+        if common["vars"]:
+            ctx["variables"] = "## Variables\n\n" + "".join(
+                f"### {var_file}\n\n```yaml\n{self._dump_yaml(var_content)}\n```\n\n"
+                for var_file, var_content in common["vars"].items()
+            )
+        
+        if common["main_tasks"]:
+            ctx["main_tasks"] = f"## Main Tasks\n\n{self._block(self._iter_task_names(common['main_tasks']))}\n"
+        
+        if common["other_tasks"]:
+            ctx["other_tasks"] = "## Other Tasks\n\n" + "".join(
+                f"### {task_file}\n\n```yaml\n{self._dump_yaml(task_content)}\n```\n\n"
+                for task_file, task_content in common["other_tasks"].items()
+            )
         
-        # Default variables
-        if role_info['defaults']:
-            lines.append("## Default Variables")
-            lines.append("")
-            lines.append("```yaml")
-            lines.append(yaml.dump(role_info['defaults'], default_flow_style=False, sort_keys=False))
-            lines.append("```")
-            lines.append("")
-        
-        # Variables (vars)
-        if role_info['vars'] and any(role_info['vars'].values()):
-            lines.append("## Variables")
-            lines.append("")
-            for var_file, var_content in role_info['vars'].items():
-                if var_content:
-                    lines.append(f"### {var_file}")
-                    lines.append("")
-                    lines.append("```yaml")
-                    lines.append(yaml.dump(var_content, default_flow_style=False, sort_keys=False))
-                    lines.append("```")
-                    lines.append("")
-        
-        # Main tasks
-        if role_info['tasks'] and 'main' in role_info['tasks'] and role_info['tasks']['main']:
-            lines.append("## Main Tasks")
-            lines.append("")
-            
-            tasks = role_info['tasks']['main']
-            for idx, task in enumerate(tasks if isinstance(tasks, list) else []):
-                if 'name' in task:
-                    lines.append(f"- {task['name']}")
-            
-            # lines.append("")
-            # lines.append("```yaml")
-            # lines.append(yaml.dump(tasks, default_flow_style=False, sort_keys=False))
-            # lines.append("```")
-            lines.append("")
-        
-        # Other task files
-        other_tasks = {k: v for k, v in role_info['tasks'].items() if k != 'main' and v}
-        if other_tasks:
-            lines.append("## Other Tasks")
-            lines.append("")
-            
-            for task_file, task_content in other_tasks.items():
-                lines.append(f"### {task_file}")
-                lines.append("")
-                lines.append("```yaml")
-                lines.append(yaml.dump(task_content, default_flow_style=False, sort_keys=False))
-                lines.append("```")
-                lines.append("")
-        
-        # Handlers
         if role_info['handlers']:
-            lines.append("## Handlers")
-            lines.append("")
-            lines.append("```yaml")
-            lines.append(yaml.dump(role_info['handlers'], default_flow_style=False, sort_keys=False))
-            lines.append("```")
-            lines.append("")
-        
-        # Templates
+            ctx["handlers"] = f"## Handlers\n\n```yaml\n{self._dump_yaml(role_info['handlers'])}\n```\n\n"
+        
         if role_info['templates']:
-            lines.append("## Templates")
-            lines.append("")
-            for template in role_info['templates']:
-                lines.append(f"- `{template}`")
-            lines.append("")
-        
-        # Role structure
-        lines.append("## Role Structure")
-        lines.append("")
-        lines.append("```")
-        structure_text = self._format_structure(role_info['structure'])
-        lines.append(structure_text)
-        lines.append("```")
-        
-        # Dependencies
-        if role_info['metadata'] and 'dependencies' in role_info['metadata']:
-            dependencies = role_info['metadata']['dependencies']
-            if dependencies:
-                lines.append("")
-                lines.append("## Dependencies")
-                lines.append("")
-                
-                for dep in dependencies:
-                    if isinstance(dep, str):
-                        lines.append(f"- {dep}")
-                    elif isinstance(dep, dict) and 'role' in dep:
-                        lines.append(f"- {dep['role']}")
-                        # Add other details if available
-                        for key, value in dep.items():
-                            if key != 'role':
-                                lines.append(f"  - {key}: {value}")
-        
-        return "\n".join(lines)
+            ctx["templates"] = "## Templates\n\n" + "".join(
+                f"- `{template}`\n" for template in role_info['templates']
+            ) + "\n"
+        
+        if self.include_structure:
+            ctx["structure"] = f"## Role Structure\n\n```\n{self._format_structure(role_info['structure'])}\n```\n"
+        
+        if common["dependencies"]:
+            ctx["dependencies"] = f"\n## Dependencies\n\n{self._block(self._iter_dependencies(common['dependencies']))}"
+        
+        # Every block ends with a newline, the document itself does not
+        return MARKDOWN_TEMPLATE.format_map(ctx)[:-1]
     
     def _generate_text(self, role_info):
         """Generate documentation in text format."""
-        lines = []
-        
-        # Title and description
-        lines.append(f"ANSIBLE ROLE: {role_info['name'].upper()}")
-        lines.append("=" * (len(role_info['name']) + 14))
-        lines.append("")
-        
-        # Description from metadata
-        if role_info['metadata'] and 'galaxy_info' in role_info['metadata']:
-            galaxy_info = role_info['metadata']['galaxy_info']
-            if 'description' in galaxy_info:
-                lines.append(f"{galaxy_info['description']}")
-                lines.append("")
-        
-        # Metadata information
-        lines.append("GENERAL INFORMATION")
-        lines.append("---------------------")
-        lines.append("")
-        
-        if role_info['metadata'] and 'galaxy_info' in role_info['metadata']:
-            galaxy_info = role_info['metadata']['galaxy_info']
-            
-            if 'author' in galaxy_info:
-                lines.append(f"Author: {galaxy_info['author']}")
-            
-            if 'license' in galaxy_info:
-                lines.append(f"License: {galaxy_info['license']}")
-            
-            if 'min_ansible_version' in galaxy_info:
-                lines.append(f"Minimum Ansible Version: {galaxy_info['min_ansible_version']}")
-            
-            if 'platforms' in galaxy_info:
-                lines.append("")
-                lines.append("Supported Platforms:")
-                for platform in galaxy_info['platforms']:
-                    lines.append(f"- {platform.get('name', 'N/A')}")
-                    if 'versions' in platform:
-                        versions = ", ".join(str(v) for v in platform['versions'])
-                        lines.append(f"  - Versions: {versions}")
-            
-            lines.append("")
+        common = self._common_context(role_info)
+        galaxy_info = common["galaxy_info"]
+        ctx = dict.fromkeys(TEMPLATE_BLOCKS, "")
+        ctx["name"] = common["name"].upper()
+        ctx["title_rule"] = "=" * (len(common["name"]) + 14)
+        
+        if common["has_description"]:
+            ctx["description"] = f"{common['galaxy_info']['description']}\n\n"
+        
+        if galaxy_info is not None:
+            ctx["general_info"] = self._block(self._iter_galaxy_info(galaxy_info, "{}:"))
         
-        # Default variables
         if role_info['defaults']:
-            lines.append("DEFAULT VARIABLES")
-            lines.append("--------------------")
-            lines.append("")
-            yaml_content = yaml.dump(role_info['defaults'], default_flow_style=False, sort_keys=False)
-            lines.append(yaml_content)
-            lines.append("")
-        
-        # Variables (vars)
-        if role_info['vars'] and any(role_info['vars'].values()):
-            lines.append("VARIABLES")
-            lines.append("---------")
-            lines.append("")
-            for var_file, var_content in role_info['vars'].items():
-                if var_content:
-                    lines.append(f"{var_file}:")
-                    lines.append("-" * (len(var_file) + 1))
-                    lines.append("")
-                    yaml_content = yaml.dump(var_content, default_flow_style=False, sort_keys=False)
-                    lines.append(yaml_content)
-                    lines.append("")
-        
-        # Main tasks
-        if role_info['tasks'] and 'main' in role_info['tasks'] and role_info['tasks']['main']:
-            lines.append("MAIN TASKS")
-            lines.append("-----------------")
-            lines.append("")
-            
-            tasks = role_info['tasks']['main']
-            for idx, task in enumerate(tasks if isinstance(tasks, list) else []):
-                if 'name' in task:
-                    lines.append(f"- {task['name']}")
-            
-            lines.append("")
-            yaml_content = yaml.dump(tasks, default_flow_style=False, sort_keys=False)
-            lines.append(yaml_content)
-            lines.append("")
-        
-        # Other task files
-        other_tasks = {k: v for k, v in role_info['tasks'].items() if k != 'main' and v}
-        if other_tasks:
-            lines.append("OTHER TASKS")
-            lines.append("-------------")
-            lines.append("")
-            
-            for task_file, task_content in other_tasks.items():
-                lines.append(f"{task_file}:")
-                lines.append("-" * (len(task_file) + 1))
-                lines.append("")
-                yaml_content = yaml.dump(task_content, default_flow_style=False, sort_keys=False)
-                lines.append(yaml_content)
-                lines.append("")
-        
-        # Handlers
+            ctx["defaults"] = f"DEFAULT VARIABLES\n--------------------\n\n{self._dump_yaml(role_info['defaults'])}\n\n"
+        
+        if common["vars"]:
+            ctx["variables"] = "VARIABLES\n---------\n\n" + "".join(
+                f"{var_file}:\n{'-' * (len(var_file) + 1)}\n\n{self._dump_yaml(var_content)}\n\n"
+                for var_file, var_content in common["vars"].items()
+            )
+        
+        if common["main_tasks"]:
+            tasks = common["main_tasks"]
+            ctx["main_tasks"] = (
+                f"MAIN TASKS\n-----------------\n\n{self._block(self._iter_task_names(tasks))}\n"
+                f"{self._dump_yaml(tasks)}\n\n"
+            )
+        
+        if common["other_tasks"]:
+            ctx["other_tasks"] = "OTHER TASKS\n-------------\n\n" + "".join(
+                f"{task_file}:\n{'-' * (len(task_file) + 1)}\n\n{self._dump_yaml(task_content)}\n\n"
+                for task_file, task_content in common["other_tasks"].items()
+            )
+        
         if role_info['handlers']:
-            lines.append("HANDLERS")
-            lines.append("--------")
-            lines.append("")
-            yaml_content = yaml.dump(role_info['handlers'], default_flow_style=False, sort_keys=False)
-            lines.append(yaml_content)
-            lines.append("")
-        
-        # Templates
+            ctx["handlers"] = f"HANDLERS\n--------\n\n{self._dump_yaml(role_info['handlers'])}\n\n"
+        
         if role_info['templates']:
-            lines.append("TEMPLATES")
-            lines.append("---------")
-            lines.append("")
-            for template in role_info['templates']:
-                lines.append(f"- {template}")
-            lines.append("")
-        
-        # Role structure
-        lines.append("STRUCTURE DU RÔLE")
-        lines.append("----------------")
-        lines.append("")
-        structure_text = self._format_structure(role_info['structure'])
-        lines.append(structure_text)
-        
-        # Dependencies
-        if role_info['metadata'] and 'dependencies' in role_info['metadata']:
-            dependencies = role_info['metadata']['dependencies']
-            if dependencies:
-                lines.append("")
-                lines.append("DEPENDENCIES")
-                lines.append("-----------")
-                lines.append("")
-                
-                for dep in dependencies:
-                    if isinstance(dep, str):
-                        lines.append(f"- {dep}")
-                    elif isinstance(dep, dict) and 'role' in dep:
-                        lines.append(f"- {dep['role']}")
-                        # Ajouter d'autres détails si disponibles
-                        for key, value in dep.items():
-                            if key != 'role':
-                                lines.append(f"  - {key}: {value}")
-        
-        return "\n".join(lines)
-    
-    def _format_structure(self, structure, prefix="", is_last=True, indent=""):
-        """Format the role structure for display."""
-        lines = []
+            ctx["templates"] = "TEMPLATES\n---------\n\n" + "".join(
+                f"- {template}\n" for template in role_info['templates']
+            ) + "\n"
         
-        # Process files before directories
-        files = structure.pop("__files__", []) if "__files__" in structure else []
+        if self.include_structure:
+            ctx["structure"] = f"STRUCTURE DU RÔLE\n----------------\n\n{self._format_structure(role_info['structure'])}\n"
         
-        # Determine keys (directories) and sort them
-        items = list(structure.items())
+        if common["dependencies"]:
+            ctx["dependencies"] = f"\nDEPENDENCIES\n-----------\n\n{self._block(self._iter_dependencies(common['dependencies']))}"
         
-        for i, (key, value) in enumerate(items):
-            is_last_dir = (i == len(items) - 1 and not files)
-            
-            # Add line for directory
-            if not prefix:  # First level
-                lines.append(f"{key}/")
-                new_indent = "    "
-            else:
-                branch = "└── " if is_last_dir else "├── "
-                lines.append(f"{indent}{branch}{key}/")
-                new_indent = indent + ("    " if is_last_dir else "│   ")
-            
-            # Recursively add subdirectories
-            if value:
-                sub_structure = self._format_structure(value, f"{prefix}/{key}", is_last_dir, new_indent)
-                lines.append(sub_structure)
-        
-        # Add files
-        for i, filename in enumerate(sorted(files)):
-            is_last_file = (i == len(files) - 1)
-            branch = "└── " if is_last_file else "├── "
-            
-            if not prefix:  # First level
-                lines.append(f"{filename}")
+        # Every block ends with a newline, the document itself does not
+        return TEXT_TEMPLATE.format_map(ctx)[:-1]
+    
+    def _format_structure(self, paths):
+        """Format the role structure for display."""
+        return "\n".join(self._iter_structure(paths))
+    
+    def _iter_structure(self, paths):
+        """Yield the lines of the role structure tree from the sorted path list."""
+        # Emit the components that differ from the previous path as (depth, label) nodes
+        nodes = []
+        previous = []
+        for path in paths:
+            key = self._structure_key(path)
+            common = 0
+            while common < min(len(previous), len(key)) and previous[common] == key[common]:
+                common += 1
+            for depth in range(common, len(key)):
+                kind, name = key[depth]
+                nodes.append((depth, f"{name}/" if kind == 0 else name))
+            previous = key
+        
+        # Walk backwards to find the last entry of each directory
+        is_last = [False] * len(nodes)
+        has_next = []
+        for i in range(len(nodes) - 1, -1, -1):
+            depth = nodes[i][0]
+            del has_next[depth + 1:]
+            has_next.extend([False] * (depth + 1 - len(has_next)))
+            is_last[i] = not has_next[depth]
+            has_next[depth] = True
+        
+        # indents[depth] is the prefix of the children of the current node at that depth
+        indents = []
+        for (depth, label), last in zip(nodes, is_last):
+            if depth == 0:  # First level
+                yield label
+                child_indent = "    "
             else:
-                lines.append(f"{indent}{branch}{filename}")
-        
-        return "\n".join(lines)
+                indent = indents[depth - 1]
+                branch = "└── " if last else "├── "
+                yield f"{indent}{branch}{label}"
+                child_indent = indent + ("    " if last else "│   ")
+            del indents[depth:]
+            indents.append(child_indent)
 
 def main():
     """Main entry point of the script."""
+    # Only needed by the command line, not when the class is used as a library
+    import argparse
+    
     parser = argparse.ArgumentParser(
         description="Generate documentation from a zip file containing an Ansible role."
     )
@@ -538,6 +701,12 @@ def main():
         "-o", "--output", 
         help="Output file. Default: stdout"
     )
+    parser.add_argument(
+        "--no-structure", 
+        dest="include_structure",
+        action="store_false",
+        help="Do not analyze nor render the role structure"
+    )
     
     args = parser.parse_args()
     
@@ -545,7 +714,8 @@ def main():
         generator = AnsibleRoleDocGenerator(
             args.zip_file, 
             output_format=args.format, 
-            output_file=args.output
+            output_file=args.output,
+            include_structure=args.include_structure
         )
         doc = generator.generate_documentation()
         